@@ -1,12 +1,16 @@
+import re
 import sys
 import argparse
 
-from six import text_type as str
-
 from . import ConfigSource
 
 UNIT_SEP = chr(31)
 
+# matches long options (eg "--mymodule-force" or "--home=mydata") and
+# captures the option name
+_LONGOPT = re.compile(r"--([^=]+)")
+
+
 class Commandline(ConfigSource):
 
     rest = []
@@ -50,6 +54,10 @@ class Commandline(ConfigSource):
         super(Commandline, self).__init__(**kwargs)
         self.sectionsep = sectionsep
         self.sectionkey = kwargs.get('sectionkey', '') 
+        # the key indexes of this object and of all subsection
+        # objects sharing its Namespace, by sectionkey (see
+        # _keys_and_sections)
+        self._indexes = kwargs.get('indexes', {})
         if commandline is None:
             if kwargs.get("empty"):
                 self.commandline = []
@@ -66,8 +74,9 @@ class Commandline(ConfigSource):
                 # create a "bootstrapping" argument parser
                 self.parser = argparse.ArgumentParser()
                 for arg in self.commandline:
-                    if arg.startswith("--"):
-                        argname = arg.split("=")[0][2:]
+                    m = _LONGOPT.match(arg)
+                    if m:
+                        argname = m.group(1)
                         if argname not in self.autoargs:
                             # at this point we don't know anything about
                             # this argument other than that it exists and
@@ -103,8 +112,9 @@ class Commandline(ConfigSource):
             # reconfigure our provided parser and try to add arguments
             # for every unprocessed long option.
             for arg in self.rest:
-                if arg.startswith("--"):
-                    argname = arg.split("=")[0][2:]
+                m = _LONGOPT.match(arg)
+                if m:
+                    argname = m.group(1)
                     if (argname not in self.autoargs and
                         argname not in self.source):
                         self.parser.add_argument("--%s" % argname,
@@ -149,15 +159,50 @@ class Commandline(ConfigSource):
         # process everything and print help if -h is given
         self.source, self.rest = self.parser.parse_known_args(self.commandline)
 
+    def _keys_and_sections(self):
+        # keys() and subsections() both need to look at every
+        # attribute of our argparse.Namespace object. Do that once
+        # (self.source is replaced each time the command line is
+        # reparsed). The Namespace is shared with our subsection
+        # objects, so is the dict of indexes, which set() on any of
+        # them empties.
+        index = self._indexes.get(self.sectionkey)
+        if index is None or index[0] is not self.source:
+            keys = []
+            sections = []
+            yielded = set()
+            if self.source:
+                for arg in vars(self.source).keys():
+                    if arg.startswith(self.sectionkey) and getattr(self.source, arg) is not None:
+                        k = arg[len(self.sectionkey):]
+                        if k.startswith(UNIT_SEP):
+                            k = k[1:]
+                        if UNIT_SEP not in k:
+                            keys.append(sys.intern(k))
+                subsectionsource = dict(self.source._get_kwargs())
+            else:
+                subsectionsource = {}
+            for args in subsectionsource.keys():
+                if args.startswith(self.sectionkey):
+                    args = args[len(self.sectionkey):]
+                    if args.startswith(UNIT_SEP): # sectionsep
+                        args = args[1:]
+                else:
+                    continue
+                # '_' is the hardcoded section separator once parse_args
+                # has transformed the command line args into properties on
+                # a Namespace object.
+                if UNIT_SEP in args:
+                    section = sys.intern(args.split(UNIT_SEP)[0])
+                    if section not in yielded:
+                        sections.append(section)
+                        yielded.add(section)
+            index = (self.source, keys, sections)
+            self._indexes[self.sectionkey] = index
+        return index[1], index[2]
+
     def keys(self):
-        if self.source:
-            for arg in vars(self.source).keys():
-                if arg.startswith(self.sectionkey) and getattr(self.source, arg) is not None:
-                    k = arg[len(self.sectionkey):]
-                    if k.startswith(UNIT_SEP):
-                        k = k[1:]
-                    if UNIT_SEP not in k and getattr(self.source, arg) is not None:
-                        yield k
+        return iter(self._keys_and_sections()[0])
 
     def has(self, key):
         if self.sectionkey:
@@ -186,26 +231,7 @@ class Commandline(ConfigSource):
         # are transformed into attributes like 'mymodule<UNIT_SEP>force' on an
         # argparse.Namespace object. Therefore, we can create a list
         # of subsections
-        yielded = set()
-        if self.source:
-            subsectionsource = dict(self.source._get_kwargs())
-        else:
-            subsectionsource = {}
-        for args in subsectionsource.keys():
-            if args.startswith(self.sectionkey):
-                args = args[len(self.sectionkey):]
-                if args.startswith(UNIT_SEP): # sectionsep
-                    args = args[1:]
-            else:
-                continue
-            # '_' is the hardcoded section separator once parse_args
-            # has transformed the command line args into properties on
-            # a Namespace object.
-            if UNIT_SEP in args:
-                section = args.split(UNIT_SEP)[0]
-                if section not in yielded:
-                    yield(section)
-                    yielded.add(section)
+        return iter(self._keys_and_sections()[1])
 
     def subsection(self, key):
         if self.sectionkey:
@@ -217,10 +243,12 @@ class Commandline(ConfigSource):
                            parser=self.parser,
                            provided_parser=self._provided_parser,
                            autoargs=self.autoargs,
+                           indexes=self._indexes,
                            sectionkey=key)
 
     def set(self, key, value):
         setattr(self.source, key, value)
+        self._indexes.clear()
 
     def typed(self, key):
         # if the config value has a non-string type, then it's typed
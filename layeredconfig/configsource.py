@@ -5,6 +5,34 @@ import inspect
 
 from . import LayeredConfig
 
+
+def _listconvert(value):
+    # this function might be called with both string
+    # represenations of entire lists and simple (unquoted)
+    # strings. String representations come in two flavours,
+    # the (legacy/deprecated) python literal (eg "['foo',
+    # 'bar']") and the simple (eg "foo, bar") The
+    # ast.literal_eval handles the first case, and if the
+    # value can't be parsed as a python expression, the second
+    # way is attempted. If both fail, it is returned verbatim
+    # (not wrapped in a list, for reasons)
+    try:
+        return ast.literal_eval(value)
+    except (SyntaxError, ValueError):
+        if "," in value:
+            return [x.strip() for x in value.split(",")]
+        else:
+            return value
+
+
+# How to convert a string to a value of a given type, for those types
+# where just calling the type won't do
+_CONVERTERS = {bool: LayeredConfig.boolconvert,
+               list: _listconvert,
+               date: LayeredConfig.dateconvert,
+               datetime: LayeredConfig.datetimeconvert}
+
+
 class ConfigSource(object):
     __metaclass__ = ABCMeta
 
@@ -178,24 +206,6 @@ class ConfigSource(object):
 
         """
 
-        def listconvert(value):
-            # this function might be called with both string
-            # represenations of entire lists and simple (unquoted)
-            # strings. String representations come in two flavours,
-            # the (legacy/deprecated) python literal (eg "['foo',
-            # 'bar']") and the simple (eg "foo, bar") The
-            # ast.literal_eval handles the first case, and if the
-            # value can't be parsed as a python expression, the second
-            # way is attempted. If both fail, it is returned verbatim
-            # (not wrapped in a list, for reasons)
-            try:
-                return ast.literal_eval(value)
-            except (SyntaxError, ValueError):
-                if "," in value:
-                    return [x.strip() for x in value.split(",")]
-                else:
-                    return value
-
         # self.get(key) should never fail
         default = self.get(key)
         # if type(default) == type:
@@ -206,16 +216,8 @@ class ConfigSource(object):
             # print("Using instance for %s" % key)
             t = type(default)
 
-        if t == bool:
-            t = LayeredConfig.boolconvert
-        elif t == list:
-            t = listconvert
-        elif t == date:
-            t = LayeredConfig.dateconvert
-        elif t == datetime:
-            t = LayeredConfig.datetimeconvert
         # print("Converting %r to %r" % (value,t(value)))
-        return t(value)
+        return _CONVERTERS.get(t, t)(value)
 
     # Internal function for now, until we find a generalized
     # extensible way of handling type conversions
@@ -23,7 +23,7 @@ class DictSource(ConfigSource):
 
     def keys(self):
         for (k, v) in self.source.items():
-            if not isinstance(v, dict) and not isinstance(v, type):
+            if not isinstance(v, (dict, type)):
                 yield k
 
     def subsection(self, key):
@@ -1,4 +1,3 @@
-import six
 from . import ConfigSource
 
 import requests
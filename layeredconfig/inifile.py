@@ -1,18 +1,53 @@
-import codecs
 import logging
 import os
 import sys
-import six
-from six.moves import configparser
-from six import text_type as str
-try:
-    from collections import OrderedDict
-except ImportError:  # pragma: no cover
-    # if on python 2.6
-    from ordereddict import OrderedDict
+import configparser
+from collections import OrderedDict
 
 from . import ConfigSource
 
+# Parsed contents of INI files that have already been loaded, so that
+# loading the same, unchanged, file again doesn't require parsing
+# it. Maps the absolute path of each file to a (data, sections) tuple,
+# where data is the raw file contents.
+_INI_CACHE = {}
+
+# Name for the default section that no section header can match, so
+# that a [DEFAULT] section in the file is parsed like any other and
+# its own values can be told apart from the ones it provides to the
+# other sections.
+_NO_DEFAULTSECT = "\n"
+
+
+def _load(inifilename):
+    # Returns a RawConfigParser object with the contents of
+    # inifilename, using _INI_CACHE if possible. The file is read
+    # every time, only the parsing is skipped if it hasn't
+    # changed. The parser is always a new object since INIFile
+    # objects modify it.
+    path = os.path.abspath(inifilename)
+    with open(path, "rb") as fp:
+        data = fp.read()
+    cached = _INI_CACHE.get(path)
+    if cached and cached[0] == data:
+        sections = cached[1]
+    else:
+        reader = configparser.RawConfigParser(dict_type=OrderedDict,
+                                              default_section=_NO_DEFAULTSECT)
+        # we don't know the encoding of this file; assume utf-8
+        reader.read_string(data.decode("utf-8"), inifilename)
+        sections = [(section, reader.items(section))
+                    for section in reader.sections()]
+        _INI_CACHE[path] = (data, sections)
+
+    parser = configparser.RawConfigParser(dict_type=OrderedDict)
+    for section, items in sections:
+        if section != configparser.DEFAULTSECT:
+            parser.add_section(section)
+        for k, v in items:
+            parser.set(section, k, v)
+    return parser
+
 
 class INIFile(ConfigSource):
     def __init__(self,
@@ -71,15 +106,7 @@ class INIFile(ConfigSource):
                 if rootsection != "DEFAULT":
                     self.source.add_section(rootsection)
             else:
-                self.source = configparser.RawConfigParser(dict_type=OrderedDict)
-                if sys.version_info >= (3,2):
-                    reader = self.source.read_file
-                else:
-                    reader = self.source.readfp
-                # we don't know the encoding of this file; assume utf-8
-                with codecs.open(inifilename, encoding="utf-8") as fp:
-                    reader(fp)
-                
+                self.source = _load(inifilename)
                 self.inifilename = inifilename
         # only used when creating new INIFile objects internally
         elif 'config' in kwargs:  
@@ -99,6 +126,25 @@ class INIFile(ConfigSource):
         self.rootsection = rootsection
         self.sectionsep = sectionsep
 
+    @classmethod
+    def from_string(cls, inistring, **kwargs):
+        """Creates an INIFile object from a string in INI format, instead
+        of loading it from a file. Since there is no file to write to,
+        changes will not be saved, and the object is not writable
+        unless ``writable=True`` is given.
+
+        :param inistring: The configuration, formatted like the
+                          contents of an ini-style configuration file.
+        :type inistring: str
+
+        All other parameters are the same as for the constructor.
+
+        """
+        source = configparser.RawConfigParser(dict_type=OrderedDict)
+        source.read_string(str(inistring))
+        kwargs.setdefault('writable', False)
+        return cls(config=source, **kwargs)
+
     def typed(self, key):
         # INI files carry no intrinsic type information
         return False
@@ -113,9 +159,11 @@ class INIFile(ConfigSource):
             allsections = [x for x in self.source.sections() if x != self.rootsection]
             if self.sectionkey != self.rootsection:
                 # find out what subsections are under this subsection (eg nested sections)
-                return [x[len(self.sectionkey+self.sectionsep):].split(self.sectionsep)[0] for x in allsections if x.startswith(self.sectionkey+self.sectionsep)]
+                names = [x[len(self.sectionkey+self.sectionsep):].split(self.sectionsep)[0] for x in allsections if x.startswith(self.sectionkey+self.sectionsep)]
             else:
-                return [x for x in allsections if self.sectionsep not in x]
+                names = [x for x in allsections if self.sectionsep not in x]
+            # these end up as attribute names on LayeredConfig objects
+            return [sys.intern(x) for x in names]
 
     def subsection(self, key):
         if self.sectionkey == self.rootsection:
@@ -123,7 +171,8 @@ class INIFile(ConfigSource):
         else:
             section = self.sectionkey + self.sectionsep + key
         return INIFile(config=self.source, section=section,
-                       parent=self, identifier=self.identifier)
+                       parent=self, identifier=self.identifier,
+                       writable=self.writable)
 
     def has(self, key):
         if self.sectionkey == "DEFAULT":
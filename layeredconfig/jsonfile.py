@@ -1,12 +1,11 @@
 import json
-from six import text_type as str
 
 from . import DictSource
 
 
 class JSONFile(DictSource):
 
-    def __init__(self, jsonfilename=None, writable=True, **kwargs):
+    def __init__(self, jsonfilename=None, writable=None, **kwargs):
         """Loads and optionally saves configuration files in JSON
         format. Since JSON has some support for typed values (supports
         numbers, lists, bools, but not dates or datetimes), data from
@@ -16,10 +15,14 @@ class JSONFile(DictSource):
         :param jsonfile: The name of a JSON file, whose root element
                          should be a JSON object (python dict). Nested
                          objects are turned into nested config objects.
-        :type jsonfile: str
+                         An open file-like object can be given instead,
+                         but changes can then not be saved.
+        :type jsonfile: str or file
         :param writable: Whether changes to the LayeredConfig object
                          that has this JSONFile object amongst its
                          sources should be saved in the JSON file.
+                         ``True`` by default, unless a file-like
+                         object is given.
         :type writable: bool
 
         """
@@ -30,11 +33,22 @@ class JSONFile(DictSource):
             self.source = kwargs['defaults']
         elif kwargs.get('empty', False):
             self.source = {}
+        elif hasattr(jsonfilename, 'read'):
+            self.source = json.load(jsonfilename)
+            self.jsonfilename = None
+            self.dirty = False
         else:
             with open(jsonfilename) as fp:
                 self.source = json.load(fp)
             self.jsonfilename = jsonfilename
             self.dirty = False
+        if writable is None:
+            # changes can't be saved to a file-like object, nor to
+            # any subsection of a source that was read from one
+            if 'parent' in kwargs:
+                writable = kwargs['parent'].writable
+            else:
+                writable = not hasattr(jsonfilename, 'read')
         self.writable = writable
 
     def typed(self, key):
@@ -2,16 +2,56 @@
 
 import itertools
 import logging
+import threading
 from datetime import datetime, date
 
-try:
-    from collections import OrderedDict
-except ImportError:  # pragma: no cover
-    # if on python 2.6
-    from ordereddict import OrderedDict
+from collections import OrderedDict
+from functools import lru_cache
+
+
+# Incremented (see _changed) after every change made to a source
+# through any LayeredConfig object. Cached values and keys are stored
+# along with the generation they were looked up in, and are only used
+# as long as that is still the current one. Since sources may be
+# shared between several config objects, this is global.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def _changed():
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+
+# converted values of these types can be cached and handed out
+# repeatedly, since they can't be modified in place
+_IMMUTABLE = (str, bytes, bool, int, float, date, datetime, type(None))
+
+
+# strptime is slow, and the same few date strings tend to be converted
+# over and over (eg every time a config file is loaded). The results
+# are immutable, so they can be shared.
+@lru_cache(maxsize=1024)
+def _parsedatetime(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+@lru_cache(maxsize=1024)
+def _parsedate(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
 
 
 class LayeredConfig(object):
+    # all attribute names are reserved for configuration parameters,
+    # so the internal state is kept in slots (see __setattr__)
+    __slots__ = ('_sources', '_subsections', '_sourcesections',
+                 '_resolved', '_keys', '_cascade', '_writable', '_parent',
+                 '_sectionkey', '__weakref__')
+
     def __init__(self, *sources, **kwargs):
         """Creates a config object from one or more sources and provides
         unified access to a nested set of configuration
@@ -45,9 +85,28 @@ class LayeredConfig(object):
                          :py:meth:`~Layeredconfig.set`.
         :type writable: bool
 
+        .. note::
+
+           Values are cached once they have been looked up. Changes
+           made through any config object (by assignment or
+           :py:meth:`~LayeredConfig.set`) are picked up, also by other
+           config objects sharing the same sources, but changes made
+           directly to an underlying source are not.
+
+        .. note::
+
+           LayeredConfig objects have no ``__dict__``. Attribute
+           names starting with "_" are reserved for internal state,
+           and setting any other such attribute (eg
+           ``cfg._myattr = value``) raises :py:exc:`AttributeError`.
+           Subclasses that don't define ``__slots__`` are not
+           affected.
+
         """
         self._sources = sources
         self._subsections = OrderedDict()
+        self._resolved = {}
+        self._keys = None
         self._cascade = kwargs.get('cascade', False)
         self._writable = kwargs.get('writable', True)
         self._parent = None
@@ -55,48 +114,28 @@ class LayeredConfig(object):
 
         # Each source may have any number of named subsections. We
         # create a LayeredConfig object for each name, and stuff all
-        # matching subections from each of our sources in it.
-        #
-        # 1. find all names
-        sectionkeys = []
+        # matching subections from each of our sources in it. Those
+        # objects are only created once a subsection is first
+        # accessed (see _subsection), here we just find all names.
+        self._sourcesections = []
         for src in self._sources:
+            names = []
             try:
                 for k in src.subsections():
-                    if k not in sectionkeys:
-                        sectionkeys.append(k)
+                    names.append(k)
+                    if k not in self._subsections:
+                        self._subsections[k] = None
             except AttributeError:  # possibly others, or all
                 # we couldn't get any subsections for source, perhaps
                 # because it's an "empty" source. Well, that's ok.
                 pass
+            self._sourcesections.append(frozenset(names))
 
-        for k in sectionkeys:
-            # 2. find all subsections in all of our sources
-            s = []
-            for src in self._sources:
-                if k in list(src.subsections()):
-                    s.append(src.subsection(k))
-                else:
-                    # create an "empty" subsection object. It's
-                    # important that all the LayeredConfig objects in a
-                    # tree have the exact same set of
-                    # ConfigSource-derived types.
-                    # print("creating empty %s" % src.__class__.__name__)
-                    s.append(src.__class__(parent=src,
-                                           identifier=src.identifier,
-                                           writable=src.writable,
-                                           empty=True,
-                                           cascade=self._cascade))
-            # 3. create a LayeredConfig object for the subsection
-            c = self.__class__(*s,
-                               cascade=self._cascade,
-                               writable=self._writable)
-            c._sectionkey = k
-            c._parent = self
-            self._subsections[k] = c
-
-        # 4. give each source a chance to to some post-init setup.
+        # give each source a chance to to some post-init setup.
         for src in self._sources:
             src.setup(self)
+        # setup() may have both read and modified values
+        _changed()
 
     @staticmethod
     def write(config):
@@ -141,6 +180,7 @@ class LayeredConfig(object):
             if source.identifier == sourceid:
                 source.set(key, value)
                 # What if no source is found? We silently ignore...
+        _changed()
 
     @staticmethod
     def get(config, key, default=None):
@@ -148,9 +188,9 @@ class LayeredConfig(object):
         the parameter does not exist, like :py:meth:`dict.get` does.
         """
 
-        if hasattr(config, key):
+        try:
             return getattr(config, key)
-        else:
+        except AttributeError:
             return default
 
     @staticmethod
@@ -167,8 +207,8 @@ class LayeredConfig(object):
                 return element
 
             section = dict()
-            for key, subsection in element._subsections.items():
-                section[key] = _dump(subsection)
+            for key in element._subsections:
+                section[key] = _dump(element._subsection(key))
             for key in element:
                 section[key] = getattr(element, key)
             return section
@@ -194,10 +234,7 @@ class LayeredConfig(object):
         HH:MM:SS" (optionally ending with fractions of a second).
 
         """
-        try:
-            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
-        except ValueError:
-            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        return _parsedatetime(value)
 
     @staticmethod
     def dateconvert(value):
@@ -205,7 +242,7 @@ class LayeredConfig(object):
         object. *value* is assumed to be on the form "YYYY-MM-DD".
 
         """
-        return datetime.strptime(value, "%Y-%m-%d").date()
+        return _parsedate(value)
 
     @staticmethod
     def boolconvert(value):
@@ -229,26 +266,56 @@ class LayeredConfig(object):
         return self.dump(self).__repr__()
 
     def __iter__(self):
-        l = set()
-
-        iterables = [x.keys() for x in self._sources]
-
-        if self._cascade:
-            c = self
-            while c._parent:
-                iterables.append(c._parent)
-                c = c._parent
-
-        for k in itertools.chain(*iterables):
-            if k not in l:
-                l.add(k)
-                yield k
+        return iter(self._mergedkeys())
+
+    def __contains__(self, key):
+        return key in self._mergedkeys()
+
+    def _mergedkeys(self):
+        # the merged keys of all sources are cached along with the
+        # values, see _generation
+        keys = self._keys
+        if keys is None or keys[0] != _generation:
+            generation = _generation
+            iterables = [x.keys() for x in self._sources]
+
+            if self._cascade:
+                c = self
+                while c._parent:
+                    iterables.append(c._parent)
+                    c = c._parent
+
+            keys = (generation,
+                    OrderedDict.fromkeys(itertools.chain(*iterables)))
+            self._keys = keys
+        return keys[1]
 
     def __getattr__(self, name):
 
         if name in self._subsections:
-            return self._subsections[name]
+            return self._subsection(name)
 
+        # values found in the sources are cached by _resolve, missing
+        # keys (AttributeError) are not
+        try:
+            generation, value = self._resolved[name]
+        except KeyError:
+            return self._resolve(name)
+        if generation == _generation:
+            return value
+        return self._resolve(name)
+
+    def _resolve(self, name):
+        # NB: There's no separate index of which source has which
+        # key. The outcome of this walk is cached in _resolved, and
+        # such an index would go stale in exactly the same cases,
+        # since any assignment anywhere may change which source has
+        # a key. It can't be built from keys()
+        # either, since some sources (eg INIFile with a DEFAULT
+        # rootsection) has() keys that they don't list.
+        # a change made while we're looking makes whatever we find
+        # stale, so it's cached with the generation from before
+        generation = _generation
         found = False
         # find the appropriate value in the highest-priority source
         for source in reversed(self._sources):
@@ -268,7 +335,9 @@ class LayeredConfig(object):
 
         if found:
             if source.typed(name):
-                return source.get(name)
+                value = source.get(name)
+                self._resolved[name] = (generation, value)
+                return value
             else:
                 # we need to find a typesource for this value.
                 done = False
@@ -285,11 +354,19 @@ class LayeredConfig(object):
                         done = True
 
                 if typesource.typed(name):
-                    return typesource.typevalue(name, source.get(name))
+                    value = typesource.typevalue(name, source.get(name))
+                    # a converted value is a new object each time, so
+                    # only cache it if the caller can't mutate it
+                    if not isinstance(value, _IMMUTABLE):
+                        return value
                 else:
                     # we can't type this data, return as-is
-                    return source.get(name)
+                    value = source.get(name)
+                self._resolved[name] = (generation, value)
+                return value
         else:
+            # the parent caches what it resolves on its own, and
+            # knows which of its values are safe to cache
             if self._cascade and self._parent and name not in self._parent._subsections:
                 return self._parent.__getattr__(name)
 
@@ -312,6 +389,7 @@ class LayeredConfig(object):
                 break
         if found:
             writesource.set(name, value)
+            _changed()
             writesource.dirty = True
             while writesource.parent:
                 writesource = writesource.parent
@@ -326,7 +404,36 @@ class LayeredConfig(object):
                 break
         if found:
             source.set(name, value)  # regardless of typing
+            _changed()
         elif self._cascade and self._parent:
             return self._parent.__setattr__(name, value)
         else:
             raise AttributeError("Configuration key %s doesn't exist" % name)
+
+    def _subsection(self, key):
+        # returns the LayeredConfig object for the subsection key,
+        # creating it if needed
+        c = self._subsections[key]
+        if c is None:
+            # find all subsections in all of our sources
+            s = []
+            for src, sections in zip(self._sources, self._sourcesections):
+                if key in sections:
+                    s.append(src.subsection(key))
+                else:
+                    # create an "empty" subsection object. It's
+                    # important that all the LayeredConfig objects in a
+                    # tree have the exact same set of
+                    # ConfigSource-derived types.
+                    s.append(src.__class__(parent=src,
+                                           identifier=src.identifier,
+                                           writable=src.writable,
+                                           empty=True,
+                                           cascade=self._cascade))
+            c = self.__class__(*s,
+                               cascade=self._cascade,
+                               writable=self._writable)
+            c._sectionkey = key
+            c._parent = self
+            self._subsections[key] = c
+        return c
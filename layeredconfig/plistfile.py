@@ -1,16 +1,12 @@
 from datetime import datetime
 import codecs
 import plistlib
-import sys
-
-from six import text_type as str
-from six import binary_type as bytes
 
 from . import DictSource
 
 
 class PListFile(DictSource):
-    def __init__(self, plistfilename=None, writable=True, **kwargs):
+    def __init__(self, plistfilename=None, writable=None, **kwargs):
         """Loads and optionally saves configuration files in PList
         format. Since PList has some support for typed values (supports
         numbers, lists, bools, datetimes *but not dates*), data from
@@ -18,19 +14,19 @@ class PListFile(DictSource):
         strings.
 
         :param plistfile: The name of a PList file. Nested sections are 
-                          turned into nested config objects.
-        :type plistfile: str
+                          turned into nested config objects. An open
+                          binary file-like object can be given instead,
+                          but changes can then not be saved.
+        :type plistfile: str or file
         :param writable: Whether changes to the LayeredConfig object
                          that has this PListFile object amongst its
                          sources should be saved in the PList file.
+                         ``True`` by default, unless a file-like
+                         object is given.
         :type writable: bool
         """
-        if sys.version_info >= (3,4):
-            self.reader = plistlib.load
-            self.writer = plistlib.dump
-        else:
-            self.reader = plistlib.readPlist
-            self.writer = plistlib.writePlist
+        self.reader = plistlib.load
+        self.writer = plistlib.dump
         super(PListFile, self).__init__(**kwargs)
         if plistfilename == None and 'parent' in kwargs and hasattr(kwargs['parent'], 'plistfilename'):
             plistfilename = kwargs['parent'].plistfilename
@@ -38,12 +34,23 @@ class PListFile(DictSource):
             self.source = kwargs['defaults']
         elif kwargs.get('empty', False):
             self.source = {}
+        elif hasattr(plistfilename, 'read'):
+            self.source = self.reader(plistfilename)
+            self.plistfilename = None
+            self.dirty = False
         else:
             with open(plistfilename, "rb") as fp:
                 self.source = self.reader(fp)
             self.plistfilename = plistfilename
             self.dirty = False
         self.encoding = "utf-8"  # I hope this is a sensible default
+        if writable is None:
+            # changes can't be saved to a file-like object, nor to
+            # any subsection of a source that was read from one
+            if 'parent' in kwargs:
+                writable = kwargs['parent'].writable
+            else:
+                writable = not hasattr(plistfilename, 'read')
         self.writable = writable
         
     def set(self, key, value):
@@ -1,4 +1,3 @@
-import six
 from . import ConfigSource
 
 import inspect
@@ -30,7 +29,7 @@ class PyFile(ConfigSource):
         if pyfilename:
             with open(pyfilename) as fp:
                 pycode = compile(fp.read(), pyfilename, 'exec')
-            six.exec_(pycode, globals(), self.source)
+            exec(pycode, globals(), self.source)
         elif kwargs.get('dict'):
             self.source = kwargs['dict']
         
@@ -5,7 +5,7 @@ import yaml
 from . import DictSource
 
 class YAMLFile(DictSource):
-    def __init__(self, yamlfilename=None, writable=True, **kwargs):
+    def __init__(self, yamlfilename=None, writable=None, **kwargs):
         """Loads and optionally saves configuration files in YAML
         format. Since YAML (and the library implementing the support,
         PyYAML) has automatic support for typed values, data from this
@@ -13,10 +13,14 @@ class YAMLFile(DictSource):
 
         :param yamlfile: The name of a YAML file. Nested
                          sections are turned into nested config objects.
-        :type yamlfile: str
+                         An open file-like object can be given instead,
+                         but changes can then not be saved.
+        :type yamlfile: str or file
         :param writable: Whether changes to the LayeredConfig object
                          that has this YAMLFile object amongst its
                          sources should be saved in the YAML file.
+                         ``True`` by default, unless a file-like
+                         object is given.
         :type writable: bool
 
         """
@@ -29,12 +33,23 @@ class YAMLFile(DictSource):
             self.source = kwargs['defaults']
         elif kwargs.get('empty', False):
             self.source = {}
+        elif hasattr(yamlfilename, 'read'):
+            self.source = yaml.safe_load(yamlfilename.read())
+            self.yamlfilename = None
+            self.dirty = False
         else:
             with codecs.open(yamlfilename, encoding="utf-8") as fp:
                 # do we need safe_load?
                 self.source = yaml.safe_load(fp.read())
             self.yamlfilename = yamlfilename
             self.dirty = False
+        if writable is None:
+            # changes can't be saved to a file-like object, nor to
+            # any subsection of a source that was read from one
+            if 'parent' in kwargs:
+                writable = kwargs['parent'].writable
+            else:
+                writable = not hasattr(yamlfilename, 'read')
         self.writable = writable
         self.encoding = "utf-8"  # not sure this is ever really needed
 
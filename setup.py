@@ -1,8 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import sys
-
 try:
     from setuptools import setup
 except ImportError:
@@ -13,14 +11,10 @@ readme = open('README.rst').read()
 history = open('HISTORY.rst').read().replace('.. :changelog:', '')
 
 requirements = [
-    'six',
     'PyYAML',
     'requests'
 ]
 
-if sys.version_info < (2, 7, 0):
-    requirements.append('ordereddict >= 1.1')
-
 test_requirements = [
     # TODO: put package test requirements here
 ]
@@ -53,6 +47,7 @@ setup(
                  'layeredconfig'},
     include_package_data=True,
     install_requires=requirements,
+    python_requires='>=3.7',
     license="BSD",
     zip_safe=False,
     keywords='configuration',
@@ -61,13 +56,13 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: BSD License',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
     test_suite='tests',
     tests_require=test_requirements
@@ -1,6 +1,5 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-from __future__ import unicode_literals
 """
 test_layeredconfig
 ----------------------------------
@@ -11,117 +10,399 @@ Tests for `layeredconfig` module.
 
 import os
 import logging
-import sys
-import codecs
-from six import text_type as str
+import io
+import shutil
+import tempfile
+from pathlib import Path
 from datetime import date, datetime
-import argparse
 import json
+import configparser
 from operator import itemgetter
 from copy import deepcopy
-try:
-    from collections import OrderedDict
-except ImportError:  # pragma: no cover
-    # if on python 2.6
-    from ordereddict import OrderedDict
-
-if sys.version_info < (2, 7, 0):  # pragma: no cover
-    import unittest2 as unittest
-else:
-    import unittest
+from types import MappingProxyType
+import unittest
 import requests
 # The system under test
 from layeredconfig import (LayeredConfig, Defaults, INIFile, JSONFile,
                            YAMLFile, PListFile, PyFile, Environment,
                            Commandline, EtcdStore, UNIT_SEP)
 
+# Expected content of complex.* after modification by test_write
+_WANT_COMPLEX_INI = b"""[__root__]
+home = mydata
+processes = 4
+force = True
+extra = foo, bar
 
-class LayeredConfigHelperTests(object):
+[mymodule]
+force = False
+extra = foo, baz, quux
+expires = 2014-10-24
 
-    # Testcases for less-capable sources may override this
-    supported_types = (str, int, bool, list, date, datetime)
-    supports_nesting = True
+[mymodule.arbitrary.nesting]
+depth = works
 
-    def _test_config_singlesection(self, cfg):
-        self.assertIs(type(cfg.home), str)
-        self.assertEqual(cfg.home, 'mydata')
+[extramodule]
+unique = True
 
-        int_type = int if int in self.supported_types else str
-        self.assertIs(type(cfg.processes), int_type)
-        self.assertEqual(cfg.processes, int_type(4))
+"""
 
-        if bool in self.supported_types:
-            self.assertEqual(cfg.force, True)
-        else:
-            self.assertEqual(cfg.force, "True")
+_WANT_COMPLEX_JSON = b"""{
+    "extra": [
+        "foo",
+        "bar"
+    ],
+    "extramodule": {
+        "unique": true
+    },
+    "force": true,
+    "home": "mydata",
+    "mymodule": {
+        "arbitrary": {
+            "nesting": {
+                "depth": "works"
+            }
+        },
+        "expires": "2014-10-24",
+        "extra": [
+            "foo",
+            "baz",
+            "quux"
+        ],
+        "force": false
+    },
+    "processes": 4
+}"""
 
-        if list in self.supported_types:
-            list_type = list
-            list_want = ['foo', 'bar']
-            self.assertIs(type(cfg.extra[0]), str)
-        else:
-            list_type = str
-            list_want = "foo, bar"  # recommended list serialization
-        self.assertIs(type(cfg.extra), list_type)
-        self.assertEqual(cfg.extra, list_want)
-
-        if date in self.supported_types:
-            date_type = date
-            date_want = date(2014, 10, 15)
-        else:
-            date_type = str
-            date_want = "2014-10-15" # recommended date serialization
-        self.assertIs(type(cfg.expires), date_type)
-        self.assertEqual(cfg.expires, date_want)
-
-        if datetime in self.supported_types:
-            datetime_type = datetime
-            datetime_want = datetime(2014, 10, 15, 14, 32, 7)
-        else:
-            datetime_type = str
-            datetime_want = "2014-10-15 14:32:07"
-        self.assertIs(type(cfg.lastrun), datetime_type)
-        self.assertEqual(cfg.lastrun, datetime_want)
+# note that pyyaml sorts keys alphabetically and has specific ideas
+# on how to format the result (controllable through
+# mostly-undocumented args to dump())
+_WANT_COMPLEX_YAML = b"""extra:
+- foo
+- bar
+extramodule:
+  unique: true
+force: true
+home: mydata
+mymodule:
+  arbitrary:
+    nesting:
+      depth: works
+  expires: 2014-10-24
+  extra:
+  - foo
+  - baz
+  - quux
+  force: false
+processes: 4
+"""
 
-    def _test_config_subsections(self, cfg):
-        self.assertEqual(cfg.home, 'mydata')
-        with self.assertRaises(AttributeError):
-            cfg.mymodule.home
+# note: plistlib creates files with tabs, not spaces.
+_WANT_COMPLEX_PLIST = b"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
+<plist version="1.0">
+<dict>
+	<key>extra</key>
+	<array>
+		<string>foo</string>
+		<string>bar</string>
+	</array>
+	<key>extramodule</key>
+	<dict>
+		<key>unique</key>
+		<true/>
+	</dict>
+	<key>force</key>
+	<true/>
+	<key>home</key>
+	<string>mydata</string>
+	<key>mymodule</key>
+	<dict>
+		<key>arbitrary</key>
+		<dict>
+			<key>nesting</key>
+			<dict>
+				<key>depth</key>
+				<string>works</string>
+			</dict>
+		</dict>
+		<key>expires</key>
+		<string>2014-10-24</string>
+		<key>extra</key>
+		<array>
+			<string>foo</string>
+			<string>baz</string>
+			<string>quux</string>
+		</array>
+		<key>force</key>
+		<false/>
+	</dict>
+	<key>processes</key>
+	<integer>4</integer>
+</dict>
+</plist>
+"""
 
-        int_type = int if int in self.supported_types else str
-        self.assertEqual(cfg.processes, int_type(4))
-        with self.assertRaises(AttributeError):
-            cfg.mymodule.processes
+# Expected keys and subsections of the simple and complex fixtures
+_SIMPLE_KEYS = frozenset({'home', 'processes', 'force',
+                          'extra', 'expires', 'lastrun'})
+_COMPLEX_KEYS = frozenset({'home', 'processes', 'force', 'extra'})
+_COMPLEX_SUBSECTIONS = frozenset({'mymodule', 'extramodule'})
+_MYMODULE_KEYS = frozenset({'force', 'extra', 'expires'})
 
-        if bool in self.supported_types:
-            self.assertEqual(cfg.mymodule.force, False)
-        else:
-            self.assertEqual(cfg.mymodule.force, "False")
+# Command line fixtures for the Commandline source
+_SIMPLE_CMDLINE = ('--home=mydata',
+                   '--processes=4',
+                   '--force',  # note implicit boolean typing
+                   '--extra=foo',
+                   '--extra=bar',
+                   '--expires=2014-10-15',
+                   '--lastrun=2014-10-15 14:32:07')
+
+_COMPLEX_CMDLINE = ('--home=mydata',
+                    '--processes=4',
+                    '--force=True',
+                    '--extra=foo',
+                    '--extra=bar',
+                    '--mymodule-force=False',
+                    '--mymodule-extra=foo',
+                    '--mymodule-extra=baz',
+                    '--mymodule-expires=2014-10-15',
+                    '--mymodule-arbitrary-nesting-depth=works',
+                    '--extramodule-unique')
+
+# The canonical simple and complex configurations as python
+# values. They are read-only at the top level since several sources
+# may share them. The fixture files for the file-based sources are
+# rendered from these (see fixtures()).
+_SIMPLE_TREE = MappingProxyType({
+    'home': 'mydata',
+    'processes': 4,
+    'force': True,
+    'extra': ['foo', 'bar'],
+    'expires': date(2014, 10, 15),
+    'lastrun': datetime(2014, 10, 15, 14, 32, 7)})
+
+_COMPLEX_TREE = MappingProxyType({
+    'home': 'mydata',
+    'processes': 4,
+    'force': True,
+    'extra': ['foo', 'bar'],
+    'mymodule': {'force': False,
+                 'extra': ['foo', 'baz'],
+                 'expires': date(2014, 10, 15),
+                 'arbitrary': {
+                     'nesting': {
+                         'depth': 'works'
+                     }
+                 }
+             },
+    'extramodule': {'unique': True}})
+
+_EXTRA_TREE = MappingProxyType({'home': 'otherdata'})
+
+_EXTRA_LAYERED_TREE = MappingProxyType({'mymodule': {'force': True}})
+
+_TREES = {'simple': _SIMPLE_TREE,
+          'complex': _COMPLEX_TREE,
+          'extra': _EXTRA_TREE,
+          'extra_layered': _EXTRA_LAYERED_TREE}
+
+# The INI fixture for extra_layered overrides a value that the complex
+# fixture has as well, so that test_overwriting_with_missing_subsections
+# checks that the higher-priority subsection value wins. Since INI
+# files carry no type information, that value can be the date.
+_INI_TREES = dict(_TREES, extra_layered=MappingProxyType(
+    {'mymodule': {'expires': date(2014, 10, 15)}}))
+
+
+def _plist_compatible(tree):
+    # plists can't represent dates (only datetimes)
+    res = {}
+    for k, v in tree.items():
+        if isinstance(v, dict):
+            v = _plist_compatible(v)
+        elif isinstance(v, date) and not isinstance(v, datetime):
+            v = str(v)
+        res[k] = v
+    return res
+
+
+def _serialize_ini(tree):
+    # root-level values go in [__root__], nested sections are named
+    # by joining their keys with "."
+    parser = configparser.RawConfigParser()
+
+    def add(name, section):
+        leaves = [(k, v) for k, v in section.items()
+                  if not isinstance(v, dict)]
+        if leaves:
+            parser.add_section(name)
+            for k, v in leaves:
+                if isinstance(v, list):
+                    v = ", ".join(v)
+                parser.set(name, k, str(v))
+        for k, v in section.items():
+            if isinstance(v, dict):
+                add(k if name == "__root__" else name + "." + k, v)
+
+    add("__root__", tree)
+    fp = io.StringIO()
+    parser.write(fp)
+    return fp.getvalue().encode("utf-8")
+
+
+def _serialize(kind, tree):
+    # Renders one of the canonical trees in the given file format
+    tree = dict(tree)
+    if kind == "ini":
+        return _serialize_ini(tree)
+    elif kind == "json":
+        return json.dumps(tree, default=str, indent=4).encode("utf-8")
+    elif kind == "yaml":
+        import yaml
+        return yaml.safe_dump(tree, default_flow_style=False).encode("utf-8")
+    elif kind == "plist":
+        import plistlib
+        return plistlib.dumps(_plist_compatible(tree))
+    else:
+        raise ValueError("Unknown fixture format %s" % kind)
+
+
+_FIXTURES = {}
+
+
+def fixtures(kind):
+    # Returns the simple, complex, extra and extra_layered fixture
+    # files in the given format. Each format is only rendered the first
+    # time a test class asks for it.
+    if kind not in _FIXTURES:
+        trees = _INI_TREES if kind == "ini" else _TREES
+        _FIXTURES[kind] = dict((name, _serialize(kind, tree))
+                               for name, tree in trees.items())
+    return _FIXTURES[kind]
+
+
+# Environment variables are always strings, so there's no typing
+# information in these
+_SIMPLE_ENV = MappingProxyType({
+    'MYAPP_HOME': 'mydata',
+    'MYAPP_PROCESSES': '4',
+    'MYAPP_FORCE': 'True',
+    'MYAPP_EXTRA': 'foo, bar',
+    'MYAPP_EXPIRES': '2014-10-15',
+    'MYAPP_LASTRUN': '2014-10-15 14:32:07'})
+
+_COMPLEX_ENV = MappingProxyType({
+    'MYAPP_HOME': 'mydata',
+    'MYAPP_PROCESSES': '4',
+    'MYAPP_FORCE': 'True',
+    'MYAPP_EXTRA': 'foo, bar',
+    'MYAPP_MYMODULE_FORCE': 'False',
+    'MYAPP_MYMODULE_EXTRA': "foo, baz",
+    'MYAPP_MYMODULE_EXPIRES': '2014-10-15',
+    'MYAPP_MYMODULE_ARBITRARY_NESTING_DEPTH': 'works',
+    'MYAPP_EXTRAMODULE_UNIQUE': 'True'})
+
+# Typing information used with the Defaults source
+_TYPES = {'home': str,
+          'processes': int,
+          'force': bool,
+          'extra': list,
+          'mymodule': {'force': bool,
+                       'extra': list,
+                       'expires': date,
+                       'lastrun': datetime,
+                       }
+          }
+
+
+def _write_bytes(path, data):
+    # unbuffered writes are all a small fixture file needs. O_BINARY
+    # (Windows only) keeps line endings from being translated.
+    flags = (os.O_WRONLY | os.O_CREAT | os.O_TRUNC |
+             getattr(os, "O_BINARY", 0))
+    fd = os.open(path, flags, 0o644)
+    try:
+        # os.write may write less than it was given
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+def write_fixture(testcase, filename, data):
+    # Writes data to filename in a temporary directory that is removed
+    # when the test is finished, and returns the full path.
+    tmpdir = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, tmpdir)
+    path = os.path.join(tmpdir, filename)
+    _write_bytes(path, data)
+    return path
+
+
+def assert_file_equals(testcase, path, want):
+    # Compares the raw bytes of a written file with the expected
+    # bytes, regardless of the platform line endings used.
+    got = Path(path).read_bytes().replace(b"\r\n", b"\n")
+    testcase.assertEqual(want, got)
 
-        if list in self.supported_types:
-            list_type = list
-            list_want = ['foo', 'bar']
-            list_want_sub = ['foo', 'baz']
-        else:
-            list_type = str
-            list_want = "foo, bar"
-            list_want_sub = "foo, baz"
-        self.assertEqual(cfg.extra, list_want)
-        self.assertEqual(cfg.mymodule.extra, list_want_sub)
 
-        if self.supports_nesting:
-            self.assertEqual(cfg.mymodule.arbitrary.nesting.depth, 'works')
+class LayeredConfigHelperTests(object):
+
+    # Testcases for less-capable sources may override this
+    supported_types = (str, int, bool, list, date, datetime)
+    supports_nesting = True
+
+    # (parameter, type, value, fallback type, fallback value) for the
+    # settings in self.simple. Sources that don't support a type
+    # should provide the recommended string serialization instead.
+    _EXPECTATIONS = (
+        ('home', str, 'mydata', str, 'mydata'),
+        ('processes', int, 4, str, '4'),
+        ('force', bool, True, str, 'True'),
+        ('extra', list, ['foo', 'bar'], str, 'foo, bar'),
+        ('expires', date, date(2014, 10, 15), str, '2014-10-15'),
+        ('lastrun', datetime, datetime(2014, 10, 15, 14, 32, 7),
+         str, '2014-10-15 14:32:07'))
+
+    # same, for the settings in the mymodule subsection of self.complex
+    _SUBSECTION_EXPECTATIONS = (
+        ('force', bool, False, str, 'False'),
+        ('extra', list, ['foo', 'baz'], str, 'foo, baz'),
+        ('expires', date, date(2014, 10, 15), str, '2014-10-15'))
+
+    def _assert_expectations(self, cfg, expectations, check_type=True):
+        for attr, want_type, want, fallback_type, fallback in expectations:
+            if want_type not in self.supported_types:
+                want_type, want = fallback_type, fallback
+            with self.subTest(attr=attr):
+                got = getattr(cfg, attr)
+                if check_type:
+                    self.assertIs(type(got), want_type)
+                self.assertEqual(got, want)
 
+    def _test_config_singlesection(self, cfg):
+        self._assert_expectations(cfg, self._EXPECTATIONS)
+        if list in self.supported_types:
+            self.assertIs(type(cfg.extra[0]), str)
+
+    def _test_config_subsections(self, cfg):
+        # the root of self.complex has the first four settings of
+        # self.simple, but not expires or lastrun
+        self._assert_expectations(cfg, self._EXPECTATIONS[:4],
+                                  check_type=False)
+        mymodule = cfg.mymodule
+        for attr in ('home', 'processes'):
+            with self.assertRaises(AttributeError):
+                getattr(mymodule, attr)
         with self.assertRaises(AttributeError):
             cfg.expires
 
-        if date in self.supported_types:
-            date_type = date
-            date_want = date(2014, 10, 15)
-        else:
-            date_type = str
-            date_want = "2014-10-15" # recommended date serialization
-        self.assertEqual(cfg.mymodule.expires, date_want)
+        self._assert_expectations(mymodule, self._SUBSECTION_EXPECTATIONS,
+                                  check_type=False)
+        if self.supports_nesting:
+            self.assertEqual(mymodule.arbitrary.nesting.depth, 'works')
 
     def _test_layered_configs(self, cfg):
         self.assertEqual(cfg.home, 'otherdata')
@@ -130,14 +411,9 @@ class LayeredConfigHelperTests(object):
         self.assertEqual(cfg.mymodule.force, bool_type(False))
 
     def _test_layered_subsection_configs(self, cfg):
-        if date in self.supported_types:
-            date_type = date
-            date_want = date(2014, 10, 15)
-        else:
-            date_type = str
-            date_want = "2014-10-15" # recommended date serialization
-        self.assertIs(type(cfg.mymodule.expires), date_type)
-        self.assertEqual(cfg.mymodule.expires, date_want)
+        # only check mymodule.expires
+        self._assert_expectations(cfg.mymodule,
+                                  self._SUBSECTION_EXPECTATIONS[2:])
 
 
 class ConfigSourceHelperTests(LayeredConfigHelperTests):
@@ -146,21 +422,18 @@ class ConfigSourceHelperTests(LayeredConfigHelperTests):
     # ConfigSource-derived object. Concrete test classes should set up
     # self.simple and self.complex instances to match these.
     def test_keys(self):
-        self.assertEqual(set(self.simple.keys()),
-                         set(('home', 'processes', 'force',
-                              'extra', 'expires', 'lastrun')))
-        self.assertEqual(set(self.complex.keys()),
-                         set(('home', 'processes', 'force', 'extra')))
+        self.assertEqual(frozenset(self.simple.keys()), _SIMPLE_KEYS)
+        self.assertEqual(frozenset(self.complex.keys()), _COMPLEX_KEYS)
 
     def test_subsection_keys(self):
-        self.assertEqual(set(self.complex.subsection('mymodule').keys()),
-                         set(('force', 'extra', 'expires')))
+        self.assertEqual(frozenset(self.complex.subsection('mymodule').keys()),
+                         _MYMODULE_KEYS)
 
     def test_subsections(self):
-        self.assertEqual(set(self.simple.subsections()),
-                         set())
-        self.assertEqual(set(self.complex.subsections()),
-                         set(('mymodule', 'extramodule')))
+        self.assertEqual(frozenset(self.simple.subsections()),
+                         frozenset())
+        self.assertEqual(frozenset(self.complex.subsections()),
+                         _COMPLEX_SUBSECTIONS)
 
     def test_subsection_nested(self):
         subsec = self.complex.subsection('mymodule')
@@ -168,11 +441,13 @@ class ConfigSourceHelperTests(LayeredConfigHelperTests):
                          set(('arbitrary',)))
 
     def test_has(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             self.assertTrue(self.simple.has(key))
 
     def test_typed(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             self.assertTrue(self.simple.typed(key))
 
     def test_get(self):
@@ -272,101 +547,57 @@ class ConfigSourceHelperTests(LayeredConfigHelperTests):
 # common helper
 class TestINIFileHelper(object):
 
-    def setUp(self):
-        super(TestINIFileHelper, self).setUp()
-        with open("simple.ini", "w") as fp:
-            fp.write("""
-[__root__]
-home = mydata
-processes = 4
-force = True
-extra = foo, bar
-expires = 2014-10-15
-lastrun = 2014-10-15 14:32:07
-""")
-
-        with open("complex.ini", "w") as fp:
-            fp.write("""
-[__root__]
-home = mydata
-processes = 4
-force = True
-extra = foo, bar
-
-[mymodule]
-force = False
-extra = foo, baz
-expires = 2014-10-15
-
-[mymodule.arbitrary.nesting]
-depth = works
-
-[extramodule]
-unique = True
-""")
-
-        with open("extra.ini", "w") as fp:
-            fp.write("""
-[__root__]
-home = otherdata
-""")
-
-        with open("extra-layered.ini", "w") as fp:
-            fp.write("""
-[mymodule]
-expires = 2014-10-15
-""")
-
-
-
-    def tearDown(self):
-        super(TestINIFileHelper, self).tearDown()
-        os.unlink("simple.ini")
-        os.unlink("complex.ini")
-        os.unlink("extra.ini")
-        os.unlink("extra-layered.ini")
+    @classmethod
+    def setUpClass(cls):
+        # the fixture files are never modified by tests (those that
+        # write make their own copy, see write_fixture), so create
+        # them once per class. tearDownClass checks that this holds.
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.simple_path = os.path.join(cls._tmp.name, "simple.ini")
+        cls.complex_path = os.path.join(cls._tmp.name, "complex.ini")
+        cls.extra_path = os.path.join(cls._tmp.name, "extra.ini")
+        cls.extra_layered_path = os.path.join(cls._tmp.name,
+                                              "extra-layered.ini")
+        ini = fixtures("ini")
+        _write_bytes(cls.simple_path, ini["simple"])
+        _write_bytes(cls.complex_path, ini["complex"])
+        _write_bytes(cls.extra_path, ini["extra"])
+        _write_bytes(cls.extra_layered_path, ini["extra_layered"])
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            ini = fixtures("ini")
+            for name, path in (("simple", cls.simple_path),
+                               ("complex", cls.complex_path),
+                               ("extra", cls.extra_path),
+                               ("extra_layered", cls.extra_layered_path)):
+                if Path(path).read_bytes() != ini[name]:
+                    raise AssertionError("%s was modified by a test in %s" %
+                                         (path, cls.__name__))
+        finally:
+            cls._tmp.cleanup()
 
 
 class TestDefaults(unittest.TestCase, ConfigSourceHelperTests):
 
-    simple = Defaults({'home': 'mydata',
-                       'processes': 4,
-                       'force': True,
-                       'extra': ['foo', 'bar'],
-                       'expires': date(2014, 10, 15),
-                       'lastrun': datetime(2014, 10, 15, 14, 32, 7)})
-
-    complex = Defaults({'home': 'mydata',
-                        'processes': 4,
-                        'force': True,
-                        'extra': ['foo', 'bar'],
-                        'mymodule': {'force': False,
-                                     'extra': ['foo', 'baz'],
-                                     'expires': date(2014, 10, 15),
-                                     'arbitrary': {
-                                         'nesting': {
-                                             'depth': 'works'
-                                         }
-                                     }
-                                 },
-                        'extramodule': {'unique': True}})
-
-    extra = Defaults({'home': 'otherdata'})
-
-    extra_layered = Defaults({'mymodule': {'force': True}})
-
-class TestINIFile(TestINIFileHelper, unittest.TestCase,
-                  ConfigSourceHelperTests):
+    simple = Defaults(_SIMPLE_TREE)
+    complex = Defaults(_COMPLEX_TREE)
+    extra = Defaults(_EXTRA_TREE)
+    extra_layered = Defaults(_EXTRA_LAYERED_TREE)
+
+class TestINIFile(unittest.TestCase, ConfigSourceHelperTests):
 
     supported_types = (str,)
     supports_nesting = True
 
     def setUp(self):
-        super(TestINIFile, self).setUp()
-        self.simple = INIFile("simple.ini")
-        self.complex = INIFile("complex.ini")
-        self.extra = INIFile("extra.ini")
-        self.extra_layered = INIFile("extra-layered.ini")
+        ini = fixtures("ini")
+        self.simple = INIFile.from_string(ini["simple"].decode("utf-8"))
+        self.complex = INIFile.from_string(ini["complex"].decode("utf-8"))
+        self.extra = INIFile.from_string(ini["extra"].decode("utf-8"))
+        self.extra_layered = INIFile.from_string(
+            ini["extra_layered"].decode("utf-8"))
 
     # Overrides of TestHelper.test_get, .test_typed and
     # .test_subsection_nested due to limitations of INIFile
@@ -380,7 +611,8 @@ class TestINIFile(TestINIFileHelper, unittest.TestCase,
         self.assertEqual(self.simple.get("lastrun"), "2014-10-15 14:32:07")
 
     def test_typed(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             self.assertFalse(self.simple.typed(key))
 
     def test_inifile_default_as_root(self):
@@ -388,13 +620,9 @@ class TestINIFile(TestINIFileHelper, unittest.TestCase,
         # cascading-like behaviour in configparser.
 
         # load a modified version of complex.ini
-        with open("complex.ini") as fp:
-            ini = fp.read()
-
-        with open("complex-otherroot.ini", "w") as fp:
-            fp.write(ini.replace("[__root__]", "[DEFAULT]"))
-        cfg = LayeredConfig(INIFile("complex-otherroot.ini",
-                                    rootsection="DEFAULT"))
+        ini = fixtures("ini")["complex"].decode("utf-8").replace("[__root__]",
+                                                               "[DEFAULT]")
+        cfg = LayeredConfig(INIFile.from_string(ini, rootsection="DEFAULT"))
 
         # this is a modified/simplified version of ._test_subsections
         self.assertEqual(cfg.home, 'mydata')
@@ -411,7 +639,27 @@ class TestINIFile(TestINIFileHelper, unittest.TestCase,
         self.assertEqual(cfg.mymodule.home, 'mydata')
         self.assertEqual(cfg.mymodule.processes, '4')
 
-        os.unlink("complex-otherroot.ini")
+    def test_inifile_reload(self):
+        # loading the same file again gives an equal but independent
+        # config, and changes to the file are picked up
+        ini = fixtures("ini")["complex"].replace(b"[__root__]", b"[DEFAULT]")
+        path = write_fixture(self, "complex.ini", ini)
+        first = INIFile(path, rootsection="DEFAULT")
+        second = INIFile(path, rootsection="DEFAULT")
+        self.assertEqual(LayeredConfig.dump(LayeredConfig(first)),
+                         LayeredConfig.dump(LayeredConfig(second)))
+        self.assertEqual("mydata", second.subsection("mymodule").get("home"))
+        first.set("home", "otherdata")
+        self.assertEqual("mydata", second.get("home"))
+
+        # a rewrite that keeps both the size and the modification
+        # time of the file must be picked up as well
+        st = os.stat(path)
+        _write_bytes(path, ini.replace(b"mydata", b"urdata"))
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(st.st_size, os.stat(path).st_size)
+        third = INIFile(path, rootsection="DEFAULT")
+        self.assertEqual("urdata", third.get("home"))
 
     def test_inifile_nonexistent(self):
         logging.getLogger().setLevel(logging.CRITICAL)
@@ -441,33 +689,14 @@ class TestINIFile(TestINIFileHelper, unittest.TestCase,
         self.assertEqual("else", cfg.datadir)
 
     def test_write(self):
-        cfg = LayeredConfig(INIFile("complex.ini"))
+        path = write_fixture(self, "complex.ini", fixtures("ini")["complex"])
+        cfg = LayeredConfig(INIFile(path))
         cfg.mymodule.expires = date(2014, 10, 24)
         cfg.mymodule.extra = ['foo', 'baz', 'quux']
         # calling write for any submodule will force a write of the
         # entire config file
         LayeredConfig.write(cfg.mymodule)
-        want = """[__root__]
-home = mydata
-processes = 4
-force = True
-extra = foo, bar
-
-[mymodule]
-force = False
-extra = foo, baz, quux
-expires = 2014-10-24
-
-[mymodule.arbitrary.nesting]
-depth = works
-
-[extramodule]
-unique = True
-
-"""
-        with open("complex.ini") as fp:
-            got = fp.read().replace("\r\n", "\n")
-        self.assertEqual(want, got)
+        assert_file_equals(self, path, _WANT_COMPLEX_INI)
 
 
 class TestJSONFile(unittest.TestCase, ConfigSourceHelperTests):
@@ -475,50 +704,11 @@ class TestJSONFile(unittest.TestCase, ConfigSourceHelperTests):
     supported_types = (str, int, bool, list)
 
     def setUp(self):
-        with open("simple.json", "w") as fp:
-            fp.write("""
-{"home": "mydata",
- "processes": 4,
- "force": true,
- "extra": ["foo", "bar"],
- "expires": "2014-10-15",
- "lastrun": "2014-10-15 14:32:07"}
-""")
-
-        with open("complex.json", "w") as fp:
-            fp.write("""
-{"home": "mydata",
- "processes": 4,
- "force": true,
- "extra": ["foo", "bar"],
- "mymodule": {"force": false,
-              "extra": ["foo", "baz"],
-              "expires": "2014-10-15",
-              "arbitrary": {
-                  "nesting": {
-                      "depth": "works"
-                  }
-              }
-          },
- "extramodule": {"unique": true}
-}
-""")
-        with open("extra.json", "w") as fp:
-            fp.write('{"home": "otherdata"}')
-
-        with open("extra-layered.json", "w") as fp:
-            fp.write('{"mymodule": {"force": true}}')
-
-        self.simple = JSONFile("simple.json")
-        self.complex = JSONFile("complex.json")
-        self.extra = JSONFile("extra.json")
-        self.extra_layered = JSONFile("extra-layered.json")
-
-    def tearDown(self):
-        os.unlink("simple.json")
-        os.unlink("complex.json")
-        os.unlink("extra.json")
-        os.unlink("extra-layered.json")
+        files = fixtures("json")
+        self.simple = JSONFile(io.BytesIO(files["simple"]))
+        self.complex = JSONFile(io.BytesIO(files["complex"]))
+        self.extra = JSONFile(io.BytesIO(files["extra"]))
+        self.extra_layered = JSONFile(io.BytesIO(files["extra_layered"]))
 
     def test_get(self):
         self.assertEqual(self.simple.get("home"), "mydata")
@@ -529,7 +719,8 @@ class TestJSONFile(unittest.TestCase, ConfigSourceHelperTests):
         self.assertEqual(self.simple.get("lastrun"), "2014-10-15 14:32:07")
 
     def test_typed(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             # JSON can type ints, bools and lists
             if key in ("processes", "force", "extra"):
                 self.assertTrue(self.simple.typed(key))
@@ -538,140 +729,40 @@ class TestJSONFile(unittest.TestCase, ConfigSourceHelperTests):
 
     def test_write(self):
         self.maxDiff = None
-        cfg = LayeredConfig(self.complex)
+        path = write_fixture(self, "complex.json", fixtures("json")["complex"])
+        cfg = LayeredConfig(JSONFile(path))
         cfg.mymodule.expires = date(2014, 10, 24)
         cfg.mymodule.extra.append("quux")
         # calling write for any submodule will force a write of the
         # entire config file
         LayeredConfig.write(cfg.mymodule)
-        want = """{
-    "extra": [
-        "foo",
-        "bar"
-    ],
-    "extramodule": {
-        "unique": true
-    },
-    "force": true,
-    "home": "mydata",
-    "mymodule": {
-        "arbitrary": {
-            "nesting": {
-                "depth": "works"
-            }
-        },
-        "expires": "2014-10-24",
-        "extra": [
-            "foo",
-            "baz",
-            "quux"
-        ],
-        "force": false
-    },
-    "processes": 4
-}"""
-        with open("complex.json") as fp:
-            got = fp.read().replace("\r\n", "\n")
-        self.assertEqual(want, got)
+        assert_file_equals(self, path, _WANT_COMPLEX_JSON)
 
 class TestYAMLFile(unittest.TestCase,
                    ConfigSourceHelperTests):
     def setUp(self):
-        with open("simple.yaml", "w") as fp:
-            fp.write("""
-home: mydata
-processes: 4
-force: true
-extra:
-- foo
-- bar
-expires: 2014-10-15
-lastrun: 2014-10-15 14:32:07
-""")
-        with open("complex.yaml", "w") as fp:
-            fp.write("""
-home: mydata
-processes: 4
-force: true
-extra:
-- foo
-- bar
-mymodule:
-    force: false
-    extra:
-    - foo
-    - baz
-    expires: 2014-10-15
-    arbitrary:
-        nesting:
-            depth: works
-extramodule:
-    unique: true
-""")
-        with open("extra.yaml", "w") as fp:
-            fp.write("""
-home: otherdata
-""")
-
-        with open("extra-layered.yaml", "w") as fp:
-            fp.write("""
-mymodule:
-    force: true
-""")
-
-        self.simple = YAMLFile("simple.yaml")
-        self.complex = YAMLFile("complex.yaml")
-        self.extra = YAMLFile("extra.yaml")
-        self.extra_layered = YAMLFile("extra-layered.yaml")
-
-    def tearDown(self):
-        os.unlink("simple.yaml")
-        os.unlink("complex.yaml")
-        os.unlink("extra.yaml")
-        os.unlink("extra-layered.yaml")
+        files = fixtures("yaml")
+        self.simple = YAMLFile(io.BytesIO(files["simple"]))
+        self.complex = YAMLFile(io.BytesIO(files["complex"]))
+        self.extra = YAMLFile(io.BytesIO(files["extra"]))
+        self.extra_layered = YAMLFile(io.BytesIO(files["extra_layered"]))
 
     # Also, strings are unicode when they need to be,
     # str otherwise.
     def test_i18n(self):
-        with codecs.open("i18n.yaml", "w", encoding="utf-8") as fp:
-            fp.write("shrimpsandwich: Räksmörgås")
-        cfg = LayeredConfig(YAMLFile("i18n.yaml"))
+        data = "shrimpsandwich: Räksmörgås".encode("utf-8")
+        cfg = LayeredConfig(YAMLFile(io.BytesIO(data)))
         self.assertEqual("Räksmörgås", cfg.shrimpsandwich)
-        os.unlink("i18n.yaml")
 
     def test_write(self):
-        cfg = LayeredConfig(self.complex)
+        path = write_fixture(self, "complex.yaml", fixtures("yaml")["complex"])
+        cfg = LayeredConfig(YAMLFile(path))
         cfg.mymodule.expires = date(2014, 10, 24)
         cfg.mymodule.extra.append('quux')
         # calling write for any submodule will force a write of the
         # entire config file
         LayeredConfig.write(cfg.mymodule)
-        # note that pyyaml sorts keys alphabetically and has specific
-        # ideas on how to format the result (controllable through
-        # mostly-undocumented args to dump())
-        want = """
-extra:
-- foo
-- bar
-extramodule:
-  unique: true
-force: true
-home: mydata
-mymodule:
-  arbitrary:
-    nesting:
-      depth: works
-  expires: 2014-10-24
-  extra:
-  - foo
-  - baz
-  - quux
-  force: false
-processes: 4
-""".lstrip()
-        with open("complex.yaml") as fp:
-            got = fp.read().replace("\r\n", "\n")
-        self.assertEqual(want, got)
+        assert_file_equals(self, path, _WANT_COMPLEX_YAML)
 
 
 class TestPListFile(unittest.TestCase, ConfigSourceHelperTests):
@@ -679,107 +770,11 @@ class TestPListFile(unittest.TestCase, ConfigSourceHelperTests):
     supported_types = (str, int, bool, list, datetime)
 
     def setUp(self):
-        with open("simple.plist", "w") as fp:
-            fp.write("""<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-        <key>expires</key>
-        <string>2014-10-15</string>
-        <key>extra</key>
-        <array>
-                <string>foo</string>
-                <string>bar</string>
-        </array>
-        <key>force</key>
-        <true/>
-        <key>home</key>
-        <string>mydata</string>
-        <key>lastrun</key>
-        <date>2014-10-15T14:32:07Z</date>
-        <key>processes</key>
-        <integer>4</integer>
-</dict>
-</plist>
-""")
-        with open("complex.plist", "w") as fp:
-            fp.write("""<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-        <key>extra</key>
-        <array>
-                <string>foo</string>
-                <string>bar</string>
-        </array>
-        <key>extramodule</key>
-        <dict>
-                <key>unique</key>
-                <true/>
-        </dict>
-        <key>force</key>
-        <true/>
-        <key>home</key>
-        <string>mydata</string>
-        <key>mymodule</key>
-        <dict>
-                <key>arbitrary</key>
-                <dict>
-                        <key>nesting</key>
-                        <dict>
-                                <key>depth</key>
-                                <string>works</string>
-                        </dict>
-                </dict>
-                <key>expires</key>
-                <string>2014-10-15</string>
-                <key>extra</key>
-                <array>
-                        <string>foo</string>
-                        <string>baz</string>
-                </array>
-                <key>force</key>
-                <false/>
-        </dict>
-        <key>processes</key>
-        <integer>4</integer>
-</dict>
-</plist>
-""")
-        with open("extra.plist", "w") as fp:
-            fp.write("""<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-        <key>home</key>
-        <string>otherdata</string>
-</dict>
-</plist>
-""")
-
-        with open("extra-layered.plist", "w") as fp:
-            fp.write("""<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-        <key>mymodule</key>
-        <dict>
-                <key>force</key>
-                <true/>
-        </dict>
-</dict>
-</plist>
-""")
-        self.simple = PListFile("simple.plist")
-        self.complex = PListFile("complex.plist")
-        self.extra = PListFile("extra.plist")
-        self.extra_layered = PListFile("extra-layered.plist")
-
-    def tearDown(self):
-        os.unlink("simple.plist")
-        os.unlink("complex.plist")
-        os.unlink("extra.plist")
-        os.unlink("extra-layered.plist")
+        files = fixtures("plist")
+        self.simple = PListFile(io.BytesIO(files["simple"]))
+        self.complex = PListFile(io.BytesIO(files["complex"]))
+        self.extra = PListFile(io.BytesIO(files["extra"]))
+        self.extra_layered = PListFile(io.BytesIO(files["extra_layered"]))
 
     # override only because plists cannot handle date objects (only datetime)
     def test_get(self):
@@ -793,66 +788,18 @@ class TestPListFile(unittest.TestCase, ConfigSourceHelperTests):
 
     def test_write(self):
         self.maxDiff = None
-        cfg = LayeredConfig(self.complex)
+        path = write_fixture(self, "complex.plist", fixtures("plist")["complex"])
+        cfg = LayeredConfig(PListFile(path))
         cfg.mymodule.expires = date(2014, 10, 24)
         cfg.mymodule.extra.append('quux')
         # calling write for any submodule will force a write of the
         # entire config file
         LayeredConfig.write(cfg.mymodule)
-        # note: plistlib creates files with tabs, not spaces.
-        want = """<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-	<key>extra</key>
-	<array>
-		<string>foo</string>
-		<string>bar</string>
-	</array>
-	<key>extramodule</key>
-	<dict>
-		<key>unique</key>
-		<true/>
-	</dict>
-	<key>force</key>
-	<true/>
-	<key>home</key>
-	<string>mydata</string>
-	<key>mymodule</key>
-	<dict>
-		<key>arbitrary</key>
-		<dict>
-			<key>nesting</key>
-			<dict>
-				<key>depth</key>
-				<string>works</string>
-			</dict>
-		</dict>
-		<key>expires</key>
-		<string>2014-10-24</string>
-		<key>extra</key>
-		<array>
-			<string>foo</string>
-			<string>baz</string>
-			<string>quux</string>
-		</array>
-		<key>force</key>
-		<false/>
-	</dict>
-	<key>processes</key>
-	<integer>4</integer>
-</dict>
-</plist>
-"""
-        if sys.version_info < (2,7,0): # pragma: no cover
-            # on py26, the doctype includes "Apple Computer" not "Apple"...
-            want = want.replace("//Apple//", "//Apple Computer//")
-        with open("complex.plist") as fp:
-            got = fp.read().replace("\r\n", "\n")
-        self.assertEqual(want, got)
+        assert_file_equals(self, path, _WANT_COMPLEX_PLIST)
 
     def test_typed(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             # PList can type ints, bools, lists and datetimes (but not dates)
             if key in ("processes", "force", "extra", "lastrun"):
                 self.assertTrue(self.simple.typed(key))
@@ -863,8 +810,7 @@ class TestPListFile(unittest.TestCase, ConfigSourceHelperTests):
 class TestPyFile(unittest.TestCase, ConfigSourceHelperTests):
 
     def setUp(self):
-        with open("simple.py", "w") as fp:
-            fp.write("""from __future__ import unicode_literals
+        simple_path = write_fixture(self, "simple.py", b"""from __future__ import unicode_literals
 import datetime
 
 expires = datetime.date(2014,10,15)
@@ -874,8 +820,7 @@ home = 'mydata'
 lastrun = datetime.datetime(2014,10,15,14,32,7)
 processes = 4
 """)
-        with open("complex.py", "w") as fp:
-            fp.write("""from __future__ import unicode_literals
+        complex_path = write_fixture(self, "complex.py", b"""from __future__ import unicode_literals
 import datetime
 
 extra = ['foo', 'bar']
@@ -895,28 +840,20 @@ extramodule = Subsection()
 extramodule.unique = True
 """)
 
-        with open("extra.py", "w") as fp:
-            fp.write("""from __future__ import unicode_literals
+        extra_path = write_fixture(self, "extra.py", b"""from __future__ import unicode_literals
 
 home = 'otherdata'
 """)
 
-        with open("extra-layered.py", "w") as fp:
-            fp.write("""from __future__ import unicode_literals
+        extra_layered_path = write_fixture(self, "extra-layered.py", b"""from __future__ import unicode_literals
 
 mymodule = Subsection()
 mymodule.force = True
 """)
-        self.simple = PyFile("simple.py")
-        self.complex = PyFile("complex.py")
-        self.extra = PyFile("extra.py")
-        self.extra_layered = PyFile("extra-layered.py")
-
-    def tearDown(self):
-        os.unlink("simple.py")
-        os.unlink("complex.py")
-        os.unlink("extra.py")
-        os.unlink("extra-layered.py")
+        self.simple = PyFile(simple_path)
+        self.complex = PyFile(complex_path)
+        self.extra = PyFile(extra_path)
+        self.extra_layered = PyFile(extra_layered_path)
 
 
 class TestCommandline(unittest.TestCase, ConfigSourceHelperTests):
@@ -925,28 +862,10 @@ class TestCommandline(unittest.TestCase, ConfigSourceHelperTests):
     # are typed as bool (eg "--force", not "--force=True")
     supported_types = (str, list, bool)
 
-    simple_cmdline = ['--home=mydata',
-                      '--processes=4',
-                      '--force',  # note implicit boolean typing
-                      '--extra=foo',
-                      '--extra=bar',
-                      '--expires=2014-10-15',
-                      '--lastrun=2014-10-15 14:32:07']
-
-    complex_cmdline = ['--home=mydata',
-                       '--processes=4',
-                       '--force=True',
-                       '--extra=foo',
-                       '--extra=bar',
-                       '--mymodule-force=False',
-                       '--mymodule-extra=foo',
-                       '--mymodule-extra=baz',
-                       '--mymodule-expires=2014-10-15',
-                       '--mymodule-arbitrary-nesting-depth=works',
-                       '--extramodule-unique']
+    simple_cmdline = _SIMPLE_CMDLINE
+    complex_cmdline = _COMPLEX_CMDLINE
 
     def setUp(self):
-        super(TestCommandline, self).setUp()
         # this means we lack typing information
         self.simple = Commandline(self.simple_cmdline)
         self.complex = Commandline(self.complex_cmdline)
@@ -962,8 +881,23 @@ class TestCommandline(unittest.TestCase, ConfigSourceHelperTests):
         self.assertEqual(self.simple.get("expires"), "2014-10-15")
         self.assertEqual(self.simple.get("lastrun"), "2014-10-15 14:32:07")
 
+    def test_keys_after_set(self):
+        self.assertNotIn("newkey", list(self.simple.keys()))
+        self.simple.set("newkey", "value")
+        self.assertIn("newkey", list(self.simple.keys()))
+
+    def test_keys_after_subsection_set(self):
+        # subsection objects share the Namespace of their parent, so
+        # a change made through one of them affects the parent's keys
+        src = Commandline(['--home=mydata', '--mymodule-force'])
+        self.assertEqual(['home'], list(src.keys()))
+        src.subsection('mymodule').set('newkey', 'value')
+        self.assertTrue(src.has('newkey'))
+        self.assertEqual(['home', 'newkey'], list(src.keys()))
+
     def test_typed(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             # these should be typed as bool and list, respectively
             if key in ("force", "extra"):
                 self.assertTrue(self.simple.typed(key))
@@ -1017,8 +951,10 @@ class TestCommandline(unittest.TestCase, ConfigSourceHelperTests):
 class TestCommandlineConfigured(TestCommandline):
 
     supported_types = (str, int, bool, date, datetime, list)
-    def setUp(self):
-        super(TestCommandlineConfigured, self).setUp()
+
+    @classmethod
+    def setUpClass(cls):
+        import argparse
         simp = argparse.ArgumentParser(description="This is a simple program")
         simp.add_argument('--home', help="The home directory of the app")
         simp.add_argument('--processes', type=int, help="Number of simultaneous processes")
@@ -1027,8 +963,7 @@ class TestCommandlineConfigured(TestCommandline):
         simp.add_argument('--expires', type=LayeredConfig.dateconvert)
         simp.add_argument('--lastrun', type=LayeredConfig.datetimeconvert)
         simp.add_argument('--unused')
-        self.simple = Commandline(self.simple_cmdline,
-                                  parser=simp)
+        cls._simp_parser = simp
 
         comp = argparse.ArgumentParser(description="This is a complex program")
         comp.add_argument('--home', help="The home directory of the app")
@@ -1040,8 +975,16 @@ class TestCommandlineConfigured(TestCommandline):
         comp.add_argument('--mymodule-expires', type=LayeredConfig.dateconvert, dest='mymodule'+UNIT_SEP+'expires')
         comp.add_argument('--mymodule-arbitrary-nesting-depth', dest='mymodule'+UNIT_SEP+'arbitrary'+UNIT_SEP+"nesting"+UNIT_SEP+"depth")
         comp.add_argument('--extramodule-unique', nargs='?', const=True, dest='extramodule'+UNIT_SEP+'unique')
+        cls._comp_parser = comp
+
+    def setUp(self):
+        # Commandline adds arguments to the parser it's given (eg. for
+        # any config keys the parser doesn't know about), so every
+        # test needs its own copy of the preconfigured parsers.
+        self.simple = Commandline(self.simple_cmdline,
+                                  parser=deepcopy(self._simp_parser))
         self.complex = Commandline(self.complex_cmdline,
-                                   parser=comp)
+                                   parser=deepcopy(self._comp_parser))
 
     def test_get(self):
         # re-enable the original impl of test_get
@@ -1060,23 +1003,8 @@ class TestEnvironment(unittest.TestCase, ConfigSourceHelperTests):
 
     supported_types = (str,)
 
-    simple = Environment({'MYAPP_HOME': 'mydata',
-                          'MYAPP_PROCESSES': '4',
-                          'MYAPP_FORCE': 'True',
-                          'MYAPP_EXTRA': 'foo, bar',
-                          'MYAPP_EXPIRES': '2014-10-15',
-                          'MYAPP_LASTRUN': '2014-10-15 14:32:07'},
-                         prefix="MYAPP_")
-    complex = Environment({'MYAPP_HOME': 'mydata',
-                           'MYAPP_PROCESSES': '4',
-                           'MYAPP_FORCE': 'True',
-                           'MYAPP_EXTRA': 'foo, bar',
-                           'MYAPP_MYMODULE_FORCE': 'False',
-                           'MYAPP_MYMODULE_EXTRA': "foo, baz",
-                           'MYAPP_MYMODULE_EXPIRES': '2014-10-15',
-                           'MYAPP_MYMODULE_ARBITRARY_NESTING_DEPTH': 'works',
-                           'MYAPP_EXTRAMODULE_UNIQUE': 'True'},
-                          prefix="MYAPP_")
+    simple = Environment(_SIMPLE_ENV, prefix="MYAPP_")
+    complex = Environment(_COMPLEX_ENV, prefix="MYAPP_")
 
     def test_get(self):
         self.assertEqual(self.simple.get("home"), "mydata")
@@ -1098,7 +1026,8 @@ class TestEnvironment(unittest.TestCase, ConfigSourceHelperTests):
         pass
 
     def test_typed(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             self.assertFalse(self.simple.typed(key))
 
 
@@ -1162,7 +1091,8 @@ class TestEtcdStore(unittest.TestCase, ConfigSourceHelperTests):
         pass
 
     def test_typed(self):
-        for key in self.simple.keys():
+        keys = tuple(self.simple.keys())
+        for key in keys:
             self.assertFalse(self.simple.typed(key))
 
     def test_get(self):
@@ -1299,16 +1229,7 @@ class TestEtcdStore(unittest.TestCase, ConfigSourceHelperTests):
 
 
 class TestTyping(unittest.TestCase, LayeredConfigHelperTests):
-    types = {'home': str,
-             'processes': int,
-             'force': bool,
-             'extra': list,
-             'mymodule': {'force': bool,
-                          'extra': list,
-                          'expires': date,
-                          'lastrun': datetime,
-                      }
-             }
+    types = _TYPES
 
     def test_typed_commandline(self):
         cmdline = ['--home=mydata',
@@ -1377,6 +1298,7 @@ class TestTyping(unittest.TestCase, LayeredConfigHelperTests):
         # The big test here is really the partially-configured
         # ArgumentParser (handles one positional argument but not the
         # optional --force)
+        import argparse
         defaults = {'force': False}
         cmdline = ['command', '--force']
         parser = argparse.ArgumentParser()
@@ -1409,22 +1331,13 @@ class TestTyping(unittest.TestCase, LayeredConfigHelperTests):
 class TestTypingINIFile(TestINIFileHelper,
                         LayeredConfigHelperTests,
                         unittest.TestCase):
-    types = {'home': str,
-             'processes': int,
-             'force': bool,
-             'extra': list,
-             'mymodule': {'force': bool,
-                          'extra': list,
-                          'expires': date,
-                          'lastrun': datetime,
-                      }
-             }
+    types = _TYPES
 
     # FIXME: find a neat way to run the tests in
     # test_config_subsections with a LayeredConfig object that uses a
     # Default object for typing
     def test_typed_inifile(self):
-        cfg = LayeredConfig(Defaults(self.types), INIFile("complex.ini"))
+        cfg = LayeredConfig(Defaults(self.types), INIFile(self.complex_path))
         self.supported_types = (str, bool, int, list, date, datetime)
         self.supports_nesting = False
         self._test_config_subsections(cfg)
@@ -1437,12 +1350,12 @@ class TestLayered(TestINIFileHelper, unittest.TestCase):
         env = {'MYAPP_HOME': 'yourdata'}
         cfg = LayeredConfig(Defaults(defaults))
         self.assertEqual(cfg.home, 'someplace')
-        cfg = LayeredConfig(Defaults(defaults), INIFile("simple.ini"))
+        cfg = LayeredConfig(Defaults(defaults), INIFile(self.simple_path))
         self.assertEqual(cfg.home, 'mydata')
-        cfg = LayeredConfig(Defaults(defaults), INIFile("simple.ini"),
+        cfg = LayeredConfig(Defaults(defaults), INIFile(self.simple_path),
                             Environment(env, prefix="MYAPP_"))
         self.assertEqual(cfg.home, 'yourdata')
-        cfg = LayeredConfig(Defaults(defaults), INIFile("simple.ini"),
+        cfg = LayeredConfig(Defaults(defaults), INIFile(self.simple_path),
                             Environment(env, prefix="MYAPP_"),
                            Commandline(cmdline))
         self.assertEqual(cfg.home, 'anotherplace')
@@ -1450,9 +1363,9 @@ class TestLayered(TestINIFileHelper, unittest.TestCase):
                           'lastrun'], list(cfg))
 
     def test_layered_subsections(self):
-        defaults = OrderedDict((('force', False),
-                                ('home', 'thisdata'),
-                                ('loglevel', 'INFO')))
+        defaults = {'force': False,
+                    'home': 'thisdata',
+                    'loglevel': 'INFO'}
         cmdline = ['--mymodule-home=thatdata', '--mymodule-force']
         cfg = LayeredConfig(Defaults(defaults), Commandline(cmdline),
                             cascade=True)
@@ -1489,6 +1402,9 @@ class TestSubsections(unittest.TestCase):
                             cascade=True)
         self.assertEqual(set(['home', 'processes']),
                          set(cfg.subsection))
+        self.assertIn('processes', cfg.subsection)
+        self.assertIn('home', cfg.subsection)  # through cascading
+        self.assertNotIn('subsection', cfg)  # only keys, like iteration
 
     def test_subsection_respects_subclass(self):
         defaults = {
@@ -1515,22 +1431,34 @@ class TestSubsections(unittest.TestCase):
         with self.assertRaises(AttributeError):
             cfg.subsection.subsection
 
+    def test_lazy_subsections(self):
+        # subsection objects are only created when first accessed
+        defaults = {'home': 'mydata',
+                    'used': {'processes': 4},
+                    'unused': {'processes': 8}}
+        cfg = LayeredConfig(Defaults(defaults),
+                            INIFile())
+        self.assertEqual(4, cfg.used.processes)
+        self.assertIsNotNone(cfg._subsections['used'])
+        self.assertIsNone(cfg._subsections['unused'])
+        # but they're still listed when dumping
+        self.assertEqual({'home': 'mydata',
+                          'used': {'processes': 4},
+                          'unused': {'processes': 8}},
+                         LayeredConfig.dump(cfg))
+
 
 class TestLayeredSubsections(unittest.TestCase):
 
     def _test_subsection(self, primary, secondary, cls):
-        with open("primary.txt", "w") as fp:
-            fp.write(primary)
-        with open("secondary.txt", "w") as fp:
-            fp.write(secondary)
-        try:
-            srcs = [cls('primary.txt'), cls('secondary.txt')]
-            cfg = LayeredConfig(*srcs)
-            self.assertEqual(cfg.somevar, 'value')
-            self.assertEqual(cfg.a.b, 'b')
-        finally:
-            os.unlink("primary.txt")
-            os.unlink("secondary.txt")
+        primary_path = write_fixture(self, "primary.txt",
+                                     primary.encode("utf-8"))
+        secondary_path = write_fixture(self, "secondary.txt",
+                                       secondary.encode("utf-8"))
+        srcs = [cls(primary_path), cls(secondary_path)]
+        cfg = LayeredConfig(*srcs)
+        self.assertEqual(cfg.somevar, 'value')
+        self.assertEqual(cfg.a.b, 'b')
 
     def test_layered_yaml(self):
         self._test_subsection("""a:
@@ -1583,16 +1511,12 @@ class TestLayeredWithSingleSource(unittest.TestCase):
     # particularly with subsections
 
     def setUp(self):
-        with open("simple.yaml", "w") as fp:
-            fp.write("""
+        path = write_fixture(self, "simple.yaml", b"""
 section:
    subsection:
       key: value
 """)
-        self.yamlsource = YAMLFile("simple.yaml")
-
-    def tearDown(self):
-        os.unlink("simple.yaml")
+        self.yamlsource = YAMLFile(path)
 
     def test_commandline(self):
         cfg = LayeredConfig(self.yamlsource, Commandline())
@@ -1635,7 +1559,7 @@ class TestModifications(TestINIFileHelper, unittest.TestCase):
                     'loglevel': 'INFO'}
         cmdline = ['--mymodule-home=thatdata', '--mymodule-force']
         cfg = LayeredConfig(Defaults(defaults),
-                            INIFile("complex.ini"),
+                            INIFile(self.complex_path),
                             Commandline(cmdline),
                             cascade=True)
         cfg.mymodule.expires = date(2014, 10, 24)
@@ -1650,6 +1574,17 @@ class TestModifications(TestINIFileHelper, unittest.TestCase):
         # this shouldn't, either
         self.globalconf.base.download_text = "WHAT"
 
+    def test_write_with_stream_source(self):
+        # a source read from a stream can't be saved, so changes must
+        # go to the writable source below it
+        path = write_fixture(self, "simple.ini", fixtures("ini")["simple"])
+        cfg = LayeredConfig(INIFile(path),
+                            JSONFile(io.BytesIO(b'{"other": 1}')))
+        cfg.home = 'otherdata'
+        LayeredConfig.write(cfg)
+        self.assertEqual("otherdata", INIFile(path).get("home"))
+        self.assertFalse(INIFile.from_string("[__root__]\n").writable)
+
     def test_write_noconfigfile(self):
         cfg = LayeredConfig(Defaults({'lastrun':
                                       datetime(2012, 9, 18, 15, 41, 0)}))
@@ -1675,7 +1610,7 @@ class TestAccessors(TestINIFileHelper, unittest.TestCase):
     def test_set(self):
         # a value is set in a particular underlying source, and the
         # dirty flag isn't set.
-        cfg = LayeredConfig(INIFile("simple.ini"))
+        cfg = LayeredConfig(INIFile(self.simple_path))
         LayeredConfig.set(cfg, 'expires', date(2013, 9, 18),
                           "inifile")
         # NOTE: For this config, where no type information is
@@ -1690,7 +1625,7 @@ class TestAccessors(TestINIFileHelper, unittest.TestCase):
         cfg = LayeredConfig(Defaults({'codedefaults': 'yes',
                                       'force': False,
                                       'home': '/usr/home'}),
-                            INIFile('simple.ini'))
+                            INIFile(self.simple_path))
         # and then do a bunch of get() calls with optional fallbacks
         self.assertEqual("yes", LayeredConfig.get(cfg, "codedefaults"))
         self.assertEqual("mydata", LayeredConfig.get(cfg, "home"))
@@ -1698,6 +1633,141 @@ class TestAccessors(TestINIFileHelper, unittest.TestCase):
         self.assertEqual("NO!", LayeredConfig.get(cfg, "nonexistent", "NO!"))
 
 
+class TestLookupCaching(TestINIFileHelper, unittest.TestCase):
+    # Pins down what repeated lookups on the same config object
+    # return, so that any caching of lookups must keep returning the
+    # same (and current) values.
+
+    def setUp(self):
+        # a private copy, since some tests modify the tree
+        self.defaults = Defaults(deepcopy(dict(_COMPLEX_TREE)))
+
+    def test_subsection_identity(self):
+        cfg = LayeredConfig(self.defaults)
+        self.assertIs(cfg.mymodule, cfg.mymodule)
+        self.assertIs(cfg.mymodule.arbitrary.nesting,
+                      cfg.mymodule.arbitrary.nesting)
+
+    def test_repeated_get(self):
+        cfg = LayeredConfig(self.defaults)
+        for _ in range(3):
+            self.assertIs(cfg.extra, cfg.extra)
+            self.assertEqual('works', cfg.mymodule.arbitrary.nesting.depth)
+
+    def test_repeated_typed_get(self):
+        # values converted using another source's typing information
+        cfg = LayeredConfig(Defaults(dict(_TYPES)),
+                            INIFile(self.complex_path))
+        for _ in range(3):
+            self.assertEqual(4, cfg.processes)
+            self.assertEqual(date(2014, 10, 15), cfg.mymodule.expires)
+
+    def test_converted_list_not_shared(self):
+        # a list converted from an untyped source is a new object on
+        # every lookup, so changing one can't leak into the config
+        cfg = LayeredConfig(Defaults({'extra': list, 'processes': int}),
+                            INIFile(self.simple_path))
+        cfg.extra.append('x')
+        self.assertEqual(['foo', 'bar'], cfg.extra)
+        self.assertEqual(['foo', 'bar'], LayeredConfig.dump(cfg)['extra'])
+        cfg.processes = 5
+        cfg.extra.append('x')
+        self.assertEqual(['foo', 'bar'], cfg.extra)
+        self.assertEqual(['foo', 'bar'], LayeredConfig.dump(cfg)['extra'])
+
+    def test_shared_conversions(self):
+        # converted immutable values are shared between config
+        # objects, mutable ones never are
+        first = LayeredConfig(Defaults(dict(_TYPES)),
+                              INIFile(self.complex_path))
+        second = LayeredConfig(Defaults(dict(_TYPES)),
+                               INIFile(self.complex_path))
+        self.assertIs(first.mymodule.expires, second.mymodule.expires)
+        self.assertEqual(first.extra, second.extra)
+        self.assertIsNot(first.extra, second.extra)
+
+    def test_conversions_once(self):
+        # an untyped value is converted to an immutable type once per
+        # config object, a mutable one on every lookup
+        converted = []
+
+        class CountingDefaults(Defaults):
+            def typevalue(self, key, value):
+                converted.append(key)
+                return super(CountingDefaults, self).typevalue(key, value)
+
+        cfg = LayeredConfig(CountingDefaults(dict(_TYPES)),
+                            INIFile(self.complex_path))
+        for _ in range(3):
+            cfg.processes
+            cfg.extra
+        self.assertEqual(['processes', 'extra', 'extra', 'extra'],
+                         converted)
+
+    def test_date_conversions(self):
+        self.assertIs(LayeredConfig.dateconvert("2014-10-15"),
+                      LayeredConfig.dateconvert("2014-10-15"))
+        self.assertIs(LayeredConfig.datetimeconvert("2014-10-15 14:32:07"),
+                      LayeredConfig.datetimeconvert("2014-10-15 14:32:07"))
+        self.assertEqual(datetime(2014, 10, 15, 14, 32, 7, 500000),
+                         LayeredConfig.datetimeconvert("2014-10-15 14:32:07.5"))
+
+    def test_lookup_stops_at_first_source(self):
+        # the highest-priority source that has a value is the only
+        # one asked for it
+        consulted = []
+
+        class CountingDefaults(Defaults):
+            def has(self, key):
+                consulted.append(self.identifier)
+                return super(CountingDefaults, self).has(key)
+
+        cfg = LayeredConfig(CountingDefaults({'home': 'low'},
+                                             identifier='low'),
+                            CountingDefaults({'home': 'middle'},
+                                             identifier='middle'),
+                            CountingDefaults({}, identifier='high'))
+        self.assertEqual('middle', cfg.home)
+        self.assertEqual(['high', 'middle'], consulted)
+
+    def test_get_after_modification(self):
+        cfg = LayeredConfig(self.defaults)
+        self.assertEqual(4, cfg.processes)
+        cfg.processes = 8
+        self.assertEqual(8, cfg.processes)
+        self.assertFalse(cfg.mymodule.force)
+        LayeredConfig.set(cfg.mymodule, 'force', True)
+        self.assertTrue(cfg.mymodule.force)
+
+    def test_get_after_modification_elsewhere(self):
+        # sources may be shared between config objects, and a change
+        # made through one of them must be seen by the others
+        defaults = Defaults({'home': 'mydata'})
+        first = LayeredConfig(defaults)
+        second = LayeredConfig(defaults)
+        self.assertEqual('mydata', second.home)
+        self.assertEqual(['home'], list(second))
+        first.home = 'otherdata'
+        self.assertEqual('otherdata', second.home)
+        LayeredConfig.set(first, 'processes', 8)
+        self.assertEqual(['home', 'processes'], list(second))
+        self.assertEqual(8, second.processes)
+
+    def test_keys_after_modification(self):
+        cfg = LayeredConfig(Defaults({'home': 'mydata',
+                                      'placeholder': int}))
+        self.assertEqual(['home'], list(cfg))
+        for key in cfg:
+            cfg.placeholder = 42
+        self.assertEqual(['home', 'placeholder'], list(cfg))
+
+    def test_cascade_after_modification(self):
+        cfg = LayeredConfig(self.defaults, cascade=True)
+        self.assertEqual('mydata', cfg.mymodule.home)
+        cfg.home = 'otherdata'
+        self.assertEqual('otherdata', cfg.mymodule.home)
+
+
 class TestDump(unittest.TestCase):
     def test_dump(self):
         defaults = {